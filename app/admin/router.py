@@ -0,0 +1,53 @@
+import asyncio
+from typing import Annotated, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core import profiling
+from app.core.cache import response_cache
+from app.auth import dependencies as auth_deps
+from app.admin import schemas
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(auth_deps.get_current_admin)],
+)
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: Annotated[float, Query(gt=0, le=settings.PROFILER_MAX_SECONDS)] = 10,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 5,
+):
+    """
+    Sample all threads for ``seconds`` and return collapsed stacks, ready for
+    flamegraph.pl or speedscope. The instance keeps serving meanwhile.
+    """
+    if profiling.profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    try:
+        counts = await asyncio.to_thread(profiling.profiler.sample, seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profiling.render_collapsed(counts)
+
+@router.get("/slow-requests")
+async def list_slow_requests() -> List[dict]:
+    """
+    Most recent requests over the latency threshold, newest first.
+    """
+    return list(reversed(profiling.slow_requests.records))
+
+@router.put("/slow-requests/settings", response_model=schemas.SlowRequestSettings)
+async def update_slow_request_settings(slow_request_settings: schemas.SlowRequestSettings):
+    """
+    Change the slow request threshold without redeploying; 0 disables capture.
+    """
+    profiling.slow_requests.configure(slow_request_settings.threshold_ms)
+    return {"threshold_ms": profiling.slow_requests.threshold_ms}
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit rate and memory use of the list response cache."""
+    return response_cache.stats()
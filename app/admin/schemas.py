@@ -0,0 +1,4 @@
+from pydantic import BaseModel, Field
+
+class SlowRequestSettings(BaseModel):
+    threshold_ms: int = Field(ge=0)
@@ -11,15 +11,21 @@ from app.auth import models, schemas
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    session: Annotated[AsyncSession, Depends(get_session)],
-) -> models.User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def get_current_user_id(
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> int:
+    """
+    Validate the token without touching the database. Handlers that can
+    answer from cache use this and call ``load_user`` only when needed.
+    """
+    credentials_exception = _credentials_exception()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -28,10 +34,25 @@ async def get_current_user(
         token_data = schemas.TokenPayload(sub=int(user_id))
     except (JWTError, ValueError):
         raise credentials_exception
-        
-    result = await session.execute(select(models.User).where(models.User.id == token_data.sub))
+    return token_data.sub
+
+async def load_user(session: AsyncSession, user_id: int) -> models.User:
+    result = await session.execute(select(models.User).where(models.User.id == user_id))
     user = result.scalars().first()
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
+
+async def get_current_user(
+    user_id: Annotated[int, Depends(get_current_user_id)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> models.User:
+    return await load_user(session, user_id)
+
+async def get_current_admin(
+    current_user: Annotated[models.User, Depends(get_current_user)],
+) -> models.User:
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
@@ -1,12 +1,22 @@
 from typing import Optional
+from enum import Enum
 from sqlmodel import Field, SQLModel
 
+class NotificationMode(str, Enum):
+    Immediate = "Immediate"
+    Digest = "Digest"
+
 class UserBase(SQLModel):
     email: str = Field(unique=True, index=True)
     username: str = Field(unique=True, index=True)
     full_name: Optional[str] = None
     picture: Optional[str] = None
     expo_push_token: Optional[str] = None
+    # Server default so the column can be added to an existing user table
+    notification_mode: NotificationMode = Field(
+        default=NotificationMode.Immediate,
+        sa_column_kwargs={"server_default": NotificationMode.Immediate.value},
+    )
 
 class User(UserBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -12,6 +12,8 @@ from app.core.database import get_session
 from app.core.config import settings
 from app.core import security
 from app.auth import models, schemas, dependencies as auth_deps
+from app.core.cache import response_cache
+from app.friends import models as friend_models
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -120,6 +122,13 @@ async def read_users_me(
     """
     return current_user
 
+async def _invalidate_friend_lists(session: AsyncSession, user: models.User):
+    # The user's profile appears in each friend's cached friend list
+    result = await session.execute(
+        select(friend_models.Friendship.friend_id).where(friend_models.Friendship.user_id == user.id)
+    )
+    response_cache.bump(*result.scalars().all())
+
 @router.put("/me/device-token", response_model=models.UserRead)
 async def update_device_token(
     token_request: schemas.DeviceTokenRequest,
@@ -133,4 +142,21 @@ async def update_device_token(
     session.add(current_user)
     await session.commit()
     await session.refresh(current_user)
+    await _invalidate_friend_lists(session, current_user)
+    return current_user
+
+@router.put("/me/notification-preferences", response_model=models.UserRead)
+async def update_notification_preferences(
+    preferences: schemas.NotificationPreferencesRequest,
+    current_user: Annotated[models.User, Depends(auth_deps.get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+):
+    """
+    Choose between immediate (coalesced) pushes and a periodic digest.
+    """
+    current_user.notification_mode = preferences.mode
+    session.add(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    await _invalidate_friend_lists(session, current_user)
     return current_user
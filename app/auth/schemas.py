@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from app.auth.models import NotificationMode
 
 class Token(BaseModel):
     access_token: str
@@ -12,3 +13,6 @@ class GoogleLogin(BaseModel):
 
 class DeviceTokenRequest(BaseModel):
     token: str
+
+class NotificationPreferencesRequest(BaseModel):
+    mode: NotificationMode
@@ -0,0 +1,125 @@
+"""
+Per-user cache of serialized list responses.
+
+Entries are keyed by user id, the user's data version and the request's
+query params, and hold the exact JSON bytes sent to the client, so a hit
+needs neither the database nor serialization. Every write that can change a
+user's lists bumps that user's version (and drops their entries); the cache
+is bounded by total body size with LRU eviction.
+
+Versions live in process memory, so with several instances each one only
+sees its own writes. The cache is therefore off by default
+(``RESPONSE_CACHE_MAX_BYTES=0``) and meant for single-instance deployments;
+entries also expire after ``RESPONSE_CACHE_TTL_SECONDS``, which bounds how
+stale a response can be if a write bypasses the bump.
+"""
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+CACHE_HEADER = "X-Cache"
+
+CacheKey = Tuple[int, int, str, Tuple[Tuple[str, str], ...]]
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize ``content`` exactly as FastAPI's default JSON response would."""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, bytes]]" = OrderedDict()
+        self._user_keys: Dict[int, Set[CacheKey]] = defaultdict(set)
+        self._versions: Dict[int, int] = defaultdict(int)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def reset(self):
+        self._entries.clear()
+        self._user_keys.clear()
+        self._versions.clear()
+        self._size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def key(self, user_id: int, route: str, params) -> CacheKey:
+        """Build a key; take it *before* reading the database."""
+        return (user_id, self._versions[user_id], route, tuple(sorted(params.multi_items())))
+
+    def get(self, key: CacheKey) -> Optional[Response]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        body = entry[1]
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return Response(content=body, media_type="application/json", headers={CACHE_HEADER: "HIT"})
+
+    def put(self, key: CacheKey, body: bytes) -> Response:
+        """Store ``body`` under ``key`` and return it as a response."""
+        user_id, version = key[0], key[1]
+        if 0 < len(body) <= self.max_bytes and version == self._versions[user_id]:
+            self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl_seconds, body)
+            self._user_keys[user_id].add(key)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return Response(content=body, media_type="application/json", headers={CACHE_HEADER: "MISS"})
+
+    def bump(self, *user_ids: int):
+        """Invalidate everything cached for ``user_ids``."""
+        for user_id in set(user_ids):
+            self._versions[user_id] += 1
+            for key in list(self._user_keys.pop(user_id, ())):
+                self._remove(key)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= len(entry[1])
+        keys = self._user_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
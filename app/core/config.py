@@ -13,6 +13,38 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Push notifications: reminders sent to the same recipient within this
+    # window are merged into one summary push (0 disables coalescing)
+    NOTIFICATION_COALESCE_SECONDS: int = 60
+    # How long notifications are collected for users in digest mode.
+    # Pending batches live in process memory: a crash or OOM loses them, and
+    # on Cloud Run the flush loop only runs reliably with CPU always allocated
+    # (--no-cpu-throttling), so long digests may go out late or not at all
+    NOTIFICATION_DIGEST_SECONDS: int = 3600
+
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    # Brotli quality 0-11; compression runs on the event loop, so keep it low
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Idempotency-Key store: "memory" (per process) or "database" (shared)
+    IDEMPOTENCY_BACKEND: str = "memory"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # Upper bound on stored response bodies for the memory backend
+    IDEMPOTENCY_MEMORY_MAX_BYTES: int = 8 * 1024 * 1024
+
+    # Total size of cached list responses (0 disables the cache). Invalidation
+    # is per process, so only enable it when running a single instance
+    RESPONSE_CACHE_MAX_BYTES: int = 0
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+
+    # Users allowed to use the /admin endpoints
+    ADMIN_EMAILS: list[str] = []
+    # Requests slower than this are captured for /admin/slow-requests (0 disables)
+    SLOW_REQUEST_THRESHOLD_MS: int = 0
+    SLOW_REQUEST_BUFFER_SIZE: int = 50
+    PROFILER_MAX_SECONDS: int = 60
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,15 +1,54 @@
 from sqlmodel import SQLModel
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.types import SchemaType
 from app.core.config import settings
+from app.auth import models as auth_models
+from app.reminders import models as reminder_models
+from app.reminders import search
 
 DATABASE_URL = settings.DATABASE_URL_PROD if settings.DATABASE_URL_PROD else settings.DATABASE_URL_DEV
 engine = create_async_engine(DATABASE_URL, echo=False, future=True)
 
+# Columns added after their table was first deployed. create_all skips
+# existing tables, so these are added on startup when missing.
+ADDED_COLUMNS = [
+    reminder_models.Reminder.__table__.c.recurrence_rule,
+    auth_models.User.__table__.c.notification_mode,
+]
+
+# Indexes added to tables that already existed
+ADDED_INDEXES = [
+    reminder_models.recipient_status_due_date_index,
+]
+
+def upgrade_schema(connection: Connection):
+    """Bring tables created by older releases up to date; safe to run repeatedly."""
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for column in ADDED_COLUMNS:
+        existing = {c["name"] for c in inspector.get_columns(column.table.name)}
+        if column.name in existing:
+            continue
+        if isinstance(column.type, SchemaType):
+            # e.g. the Postgres ENUM type behind an Enum column
+            column.type.create(connection, checkfirst=True)
+        definition = CreateColumn(column).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN {definition}"))
+    for index in ADDED_INDEXES:
+        index.create(connection, checkfirst=True)
+
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+        # create_all skips existing tables, so make sure search structures exist
+        await conn.run_sync(search.create_search_index)
 
 async def get_session() -> AsyncSession:
     async_session = sessionmaker(
@@ -17,3 +56,12 @@ async def get_session() -> AsyncSession:
     )
     async with async_session() as session:
         yield session
+
+def upsert_insert(session: AsyncSession):
+    """
+    Dialect ``insert`` construct supporting ``on_conflict_do_update`` /
+    ``on_conflict_do_nothing`` (Postgres in production, SQLite locally).
+    """
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
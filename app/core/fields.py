@@ -0,0 +1,19 @@
+from typing import Iterable, List, Optional
+from fastapi import HTTPException
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: Iterable[str] = ("id",)) -> Optional[List[str]]:
+    """
+    Parse a ``fields=a,b,c`` projection into column names.
+
+    Returns ``None`` when no projection was requested. Fields in ``always``
+    are included so clients can still address the returned items.
+    """
+    if not fields:
+        return None
+    allowed = list(allowed)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*always, *requested]))
@@ -0,0 +1,259 @@
+"""
+Idempotency keys for retried POST requests.
+
+A client may send an ``Idempotency-Key`` header; the first request with a key
+runs normally and its response is stored, retries with the same key get the
+stored response replayed instead of redoing the work. A duplicate that arrives
+while the first request is still running waits for it and gets its result.
+
+Keys are scoped per user and route and stored as a SHA-256 digest, together
+with a hash of the request body; reusing a key for a different body is
+rejected with a 422. Two
+backends are available, selected by ``IDEMPOTENCY_BACKEND``: ``memory``
+(single process) and ``database`` (shared between instances).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Field, SQLModel
+from sqlalchemy import Column, DateTime, LargeBinary, delete
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import engine, upsert_insert
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class StoredResponse:
+    def __init__(self, status_code: int, body: bytes, fingerprint: Optional[str] = None):
+        self.status_code = status_code
+        self.body = body
+        # Hash of the request payload the response belongs to
+        self.fingerprint = fingerprint
+
+
+class IdempotencyRecord(SQLModel, table=True):
+    key: str = Field(primary_key=True, max_length=64)
+    fingerprint: Optional[str] = Field(default=None, max_length=64)
+    # NULL while the first request is still in flight
+    status_code: Optional[int] = None
+    body: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), index=True))
+
+
+class MemoryIdempotencyStore:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_bytes: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        # All entries share one TTL, so insertion order is expiry order
+        self._entries: "OrderedDict[str, tuple[float, StoredResponse]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._size = 0
+
+    def reset(self):
+        self._entries.clear()
+        self._in_flight.clear()
+        self._size = 0
+
+    def _evict(self):
+        now = self._clock()
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and self._size <= self.max_bytes:
+                break
+            self._remove(key)
+
+    def _remove(self, key: str):
+        _, response = self._entries.pop(key)
+        self._size -= len(response.body)
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Return the stored response for ``key``, or claim it and return ``None``."""
+        while True:
+            self._evict()
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[1]
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                self._in_flight[key] = asyncio.get_running_loop().create_future()
+                return None
+            await asyncio.shield(in_flight)
+
+    async def complete(self, key: str, response: StoredResponse):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self._clock() + self.ttl_seconds, response)
+        self._size += len(response.body)
+        # Oldest entries go first once the byte budget is exceeded
+        self._evict()
+        self._finish(key)
+
+    async def release(self, key: str):
+        self._finish(key)
+
+    def _finish(self, key: str):
+        in_flight = self._in_flight.pop(key, None)
+        if in_flight is not None and not in_flight.done():
+            in_flight.set_result(None)
+
+
+class DatabaseIdempotencyStore:
+    """
+    Stores keys in ``IdempotencyRecord``. Uses its own short-lived sessions
+    so claiming a key never interferes with the request's transaction.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        ttl_seconds: float,
+        lease_seconds: float = 30,
+        poll_interval: float = 0.1,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._sleep = sleep
+        self._sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def _claim(self, key: str, fingerprint: str) -> bool:
+        now = datetime.now(timezone.utc)
+        async with self._sessions() as session:
+            # An expired entry (or abandoned lease) no longer holds the key
+            await session.execute(
+                delete(IdempotencyRecord).where(
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.expires_at < now,
+                )
+            )
+            insert = upsert_insert(session)
+            result = await session.execute(
+                insert(IdempotencyRecord)
+                .values(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=self.lease_seconds),
+                )
+                .on_conflict_do_nothing(index_elements=["key"])
+            )
+            await session.commit()
+            return result.rowcount == 1
+
+    async def _load(self, key: str) -> Optional[IdempotencyRecord]:
+        async with self._sessions() as session:
+            return await session.get(IdempotencyRecord, key)
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + self.lease_seconds
+        while True:
+            if await self._claim(key, fingerprint):
+                return None
+            record = await self._load(key)
+            if record is not None and record.status_code is not None:
+                return StoredResponse(record.status_code, record.body, record.fingerprint)
+            if time.monotonic() > deadline:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            await self._sleep(self.poll_interval)
+
+    async def complete(self, key: str, response: StoredResponse):
+        now = datetime.now(timezone.utc)
+        async with self._sessions() as session:
+            await session.execute(
+                delete(IdempotencyRecord).where(IdempotencyRecord.expires_at < now)
+            )
+            record = await session.get(IdempotencyRecord, key)
+            if record is None:
+                record = IdempotencyRecord(key=key)
+            record.fingerprint = response.fingerprint
+            record.status_code = response.status_code
+            record.body = response.body
+            record.expires_at = now + timedelta(seconds=self.ttl_seconds)
+            session.add(record)
+            await session.commit()
+
+    async def release(self, key: str):
+        async with self._sessions() as session:
+            await session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key))
+            await session.commit()
+
+
+def _create_store():
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore(engine, settings.IDEMPOTENCY_TTL_SECONDS)
+    return MemoryIdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_MEMORY_MAX_BYTES)
+
+
+store = _create_store()
+
+
+def scoped_key(user_id: int, scope: str, key: str) -> str:
+    return hashlib.sha256(f"{user_id}:{scope}:{key}".encode()).hexdigest()
+
+
+def fingerprint(payload: SQLModel) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+async def run_idempotent(
+    key: Optional[str],
+    user_id: int,
+    scope: str,
+    payload: SQLModel,
+    handler: Callable[[], Awaitable[Any]],
+    response_model: Type[SQLModel],
+):
+    """
+    Run ``handler`` at most once per idempotency key. Successful results and
+    ``HTTPException`` responses are stored; other errors release the key so
+    the client can retry. Reusing a key with a different ``payload`` is a 422.
+    """
+    if key is None:
+        return await handler()
+
+    key = scoped_key(user_id, scope, key)
+    request_fingerprint = fingerprint(payload)
+    stored = await store.begin(key, request_fingerprint)
+    if stored is not None:
+        if stored.fingerprint != request_fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={REPLAY_HEADER: "true"},
+        )
+
+    try:
+        result = await handler()
+    except HTTPException as e:
+        body = json.dumps({"detail": e.detail}).encode()
+        await store.complete(key, StoredResponse(e.status_code, body, request_fingerprint))
+        raise
+    except BaseException:
+        await store.release(key)
+        raise
+
+    body = json.dumps(jsonable_encoder(response_model.model_validate(result))).encode()
+    await store.complete(key, StoredResponse(200, body, request_fingerprint))
+    return result
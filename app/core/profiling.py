@@ -0,0 +1,233 @@
+"""
+On-demand profiling for a running instance.
+
+``SamplingProfiler`` samples the stacks of all threads for a number of
+seconds and aggregates them into the collapsed-stack format understood by
+flamegraph.pl, speedscope and similar tools (``frame;frame;frame count``).
+
+``SlowRequestRecorder`` keeps a bounded ring buffer of requests slower than a
+threshold, each with a stack captured while the request was still running
+and the SQL it executed. When the threshold is 0 the middleware is a single
+attribute check and no SQLAlchemy listeners are installed.
+"""
+import asyncio
+import contextvars
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+MAX_STACK_DEPTH = 128
+MAX_SQL_STATEMENTS = 50
+MAX_SQL_LENGTH = 500
+
+
+def _frame_name(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame, root: Optional[str] = None) -> str:
+    """Render a frame and its callers root-first, separated by semicolons."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    if root:
+        names.append(root)
+    return ";".join(reversed(names))
+
+
+def coroutine_stack(task: asyncio.Task) -> Optional[str]:
+    """Collapsed await chain of a suspended task, outermost coroutine first."""
+    names = []
+    coro = task.get_coro()
+    while coro is not None and len(names) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        names.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return ";".join(names) or None
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float, interval: float = 0.005) -> Counter:
+        """Sample every other thread until ``seconds`` elapse (blocking)."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Profiler is already running")
+        try:
+            counts: Counter = Counter()
+            own_thread = threading.get_ident()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own_thread:
+                        counts[collapse_stack(frame, root=names.get(thread_id, str(thread_id)))] += 1
+                time.sleep(interval)
+            return counts
+        finally:
+            self._lock.release()
+
+
+def render_collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class _ActiveRequest:
+    def __init__(self, method: str, path: str, thread_id: int, task: Optional[asyncio.Task], started: float):
+        self.method = method
+        self.path = path
+        self.thread_id = thread_id
+        self.task = task
+        self.started = started
+        self.started_at = datetime.now(timezone.utc)
+        self.stack: Optional[str] = None
+        self.coroutine_stack: Optional[str] = None
+        self.sql: List[Dict[str, Any]] = []
+
+
+_current_request: contextvars.ContextVar[Optional[_ActiveRequest]] = contextvars.ContextVar(
+    "profiling_current_request", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("profiling_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    request = _current_request.get()
+    if request is None:
+        return
+    starts = conn.info.get("profiling_query_start")
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+    if len(request.sql) < MAX_SQL_STATEMENTS:
+        request.sql.append({"statement": statement[:MAX_SQL_LENGTH], "duration_ms": round(duration_ms, 3)})
+
+
+class SlowRequestRecorder:
+    """
+    Records requests slower than ``threshold_ms``. ``clock`` is injectable so
+    durations can be tested without slow requests.
+    """
+
+    def __init__(self, threshold_ms: int, buffer_size: int, clock: Callable[[], float] = time.monotonic):
+        self.records: deque = deque(maxlen=buffer_size)
+        self._clock = clock
+        self.threshold_ms = 0
+        self._active: Dict[int, _ActiveRequest] = {}
+        self._lock = threading.Lock()
+        self._watchdog: Optional[threading.Thread] = None
+        self._listening = False
+        self.configure(threshold_ms)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def configure(self, threshold_ms: int):
+        """Change the threshold at runtime; 0 disables capture."""
+        self.threshold_ms = threshold_ms
+        if self.enabled and not self._listening:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            self._listening = True
+        elif not self.enabled and self._listening:
+            event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+            self._listening = False
+
+    def start(self, method: str, path: str) -> contextvars.Token:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        request = _ActiveRequest(method, path, threading.get_ident(), task, self._clock())
+        with self._lock:
+            self._active[id(request)] = request
+        self._ensure_watchdog()
+        return _current_request.set(request)
+
+    def finish(self, token: contextvars.Token):
+        request = _current_request.get()
+        _current_request.reset(token)
+        with self._lock:
+            self._active.pop(id(request), None)
+        duration_ms = (self._clock() - request.started) * 1000
+        if self.enabled and duration_ms >= self.threshold_ms:
+            self.records.append({
+                "method": request.method,
+                "path": request.path,
+                "started_at": request.started_at.isoformat(),
+                "duration_ms": round(duration_ms, 3),
+                "stack": request.stack,
+                "coroutine_stack": request.coroutine_stack,
+                "sql": request.sql,
+            })
+
+    def _ensure_watchdog(self):
+        if self._watchdog is not None and self._watchdog.is_alive():
+            return
+        with self._lock:
+            if self._watchdog is None or not self._watchdog.is_alive():
+                self._watchdog = threading.Thread(target=self._watch, name="slow-request-watchdog", daemon=True)
+                self._watchdog.start()
+
+    def _watch(self):
+        # Captures stacks of requests that cross the threshold while still running
+        while self.enabled:
+            threshold = self.threshold_ms / 1000
+            now = self._clock()
+            with self._lock:
+                overdue = [r for r in self._active.values() if r.stack is None and now - r.started >= threshold]
+            if overdue:
+                frames = sys._current_frames()
+                for request in overdue:
+                    frame = frames.get(request.thread_id)
+                    request.stack = collapse_stack(frame) if frame is not None else ""
+                    if request.task is not None:
+                        try:
+                            request.coroutine_stack = coroutine_stack(request.task)
+                        except Exception:
+                            request.coroutine_stack = None
+            time.sleep(max(threshold / 4, 0.01))
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, recorder: SlowRequestRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.recorder.enabled:
+            await self.app(scope, receive, send)
+            return
+        token = self.recorder.start(scope["method"], scope["path"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.recorder.finish(token)
+
+
+profiler = SamplingProfiler()
+slow_requests = SlowRequestRecorder(settings.SLOW_REQUEST_THRESHOLD_MS, settings.SLOW_REQUEST_BUFFER_SIZE)
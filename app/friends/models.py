@@ -1,6 +1,7 @@
 from typing import Optional
 from sqlmodel import Field, SQLModel
 from datetime import datetime
+from sqlalchemy import Index
 
 class FriendshipBase(SQLModel):
     user_id: int = Field(foreign_key="user.id", primary_key=True)
@@ -12,3 +13,20 @@ class Friendship(FriendshipBase, table=True):
 
 class FriendshipCreate(SQLModel):
     friend_email_or_username: str
+
+class FriendSuggestion(SQLModel, table=True):
+    """Number of mutual friends between two users, maintained by add_friend."""
+    __table_args__ = (
+        Index("ix_friendsuggestion_user_mutual_count", "user_id", "mutual_count"),
+    )
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    candidate_id: int = Field(foreign_key="user.id", primary_key=True)
+    mutual_count: int = 0
+
+class FriendSuggestionRead(SQLModel):
+    # Suggested users are not friends yet, so only their public profile
+    id: int
+    username: str
+    full_name: Optional[str] = None
+    picture: Optional[str] = None
+    mutual_friends: int
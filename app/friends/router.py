@@ -1,15 +1,18 @@
 import logging
 
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
 from sqlmodel import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_session
+from app.core import idempotency
+from app.core.cache import response_cache, render_json
+from app.core.fields import parse_fields
 from app.auth import models as auth_models
 from app.auth import dependencies as auth_deps
-from app.friends import models
+from app.friends import models, suggestions
 
 router = APIRouter(prefix="/friends", tags=["friends"])
 
@@ -18,7 +21,26 @@ async def add_friend(
     friend_data: models.FriendshipCreate,
     current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)],
+    idempotency_key: Annotated[Optional[str], Header()] = None,
 ):
+    """
+    Add a friend (auto-accepted). Retries carrying the same
+    ``Idempotency-Key`` get the original response instead of "Already friends".
+    """
+    return await idempotency.run_idempotent(
+        idempotency_key,
+        current_user.id,
+        "POST /friends",
+        friend_data,
+        lambda: _add_friend(friend_data, current_user, session),
+        auth_models.UserRead,
+    )
+
+async def _add_friend(
+    friend_data: models.FriendshipCreate,
+    current_user: auth_models.User,
+    session: AsyncSession,
+) -> auth_models.User:
     # Find target user
     query = select(auth_models.User).where(
         or_(
@@ -48,25 +70,71 @@ async def add_friend(
     friendship_1 = models.Friendship(user_id=current_user.id, friend_id=target_user.id)
     friendship_2 = models.Friendship(user_id=target_user.id, friend_id=current_user.id)
     
+    await suggestions.record_friendship(session, current_user.id, target_user.id)
     session.add(friendship_1)
     session.add(friendship_2)
     await session.commit()
+    response_cache.bump(current_user.id, target_user.id)
     
     return target_user
 
 @router.get("/", response_model=List[auth_models.UserRead])
 async def list_friends(
-    current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
+    request: Request,
+    user_id: Annotated[int, Depends(auth_deps.get_current_user_id)],
     session: Annotated[AsyncSession, Depends(get_session)],
+    fields: Optional[str] = None,
 ):
+    """
+    List friends. ``fields=username,picture`` restricts both the selected
+    columns and the returned keys (``id`` is always included).
+
+    Responses are served from the per-user cache until the friend list or a
+    friend's profile changes.
+    """
+    cache_key = response_cache.key(user_id, "friends", request.query_params)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    current_user = await auth_deps.load_user(session, user_id)
+
     logging.info(f"Listing friends for user: {current_user}")
+    requested = parse_fields(fields, auth_models.User.__table__.columns.keys())
     # Join to get user details
     # We want valid friends for current_user
-    query = select(auth_models.User).join(
+    if requested is None:
+        query = select(auth_models.User)
+    else:
+        query = select(*(getattr(auth_models.User, name) for name in requested))
+    query = query.join(
         models.Friendship, 
         models.Friendship.friend_id == auth_models.User.id
     ).where(models.Friendship.user_id == current_user.id)
     
     result = await session.execute(query)
-    friends = result.scalars().all()
-    return friends
+    if requested is None:
+        content = [auth_models.UserRead.model_validate(friend) for friend in result.scalars().all()]
+    else:
+        content = [dict(row._mapping) for row in result]
+    return response_cache.put(cache_key, render_json(content))
+
+@router.get("/suggestions", response_model=List[models.FriendSuggestionRead])
+async def list_friend_suggestions(
+    current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+):
+    """
+    Friends of friends, ranked by number of mutual friends.
+    """
+    top = await suggestions.top_suggestions(session, current_user.id, limit)
+    return [
+        models.FriendSuggestionRead(
+            id=user.id,
+            username=user.username,
+            full_name=user.full_name,
+            picture=user.picture,
+            mutual_friends=mutual_count,
+        )
+        for user, mutual_count in top
+    ]
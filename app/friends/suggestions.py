@@ -0,0 +1,156 @@
+"""
+Friend-of-friend suggestions backed by a precomputed candidate table.
+
+``FriendSuggestion`` holds, for every pair of users sharing at least one
+friend, how many friends they have in common. ``add_friend`` keeps it up to
+date by touching only the neighborhoods of the two users involved, so reading
+the top candidates is a single indexed query instead of a self-join over
+``Friendship``. Pairs that are already friends are kept in the table and
+filtered out when reading.
+
+The table can be rebuilt from scratch with::
+
+    python -m app.friends.suggestions
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+from sqlmodel import select
+from sqlalchemy import delete, exists, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, sessionmaker
+
+from app.core.database import engine, upsert_insert
+from app.auth import models as auth_models
+from app.friends import models
+
+CHUNK_SIZE = 500
+
+
+async def _friend_ids(session: AsyncSession, user_ids: List[int]) -> Dict[int, Set[int]]:
+    query = select(models.Friendship.user_id, models.Friendship.friend_id).where(
+        models.Friendship.user_id.in_(user_ids)
+    )
+    neighbours: Dict[int, Set[int]] = defaultdict(set)
+    for user_id, friend_id in await session.execute(query):
+        neighbours[user_id].add(friend_id)
+    return neighbours
+
+
+async def _increment(session: AsyncSession, increments: Counter):
+    insert = upsert_insert(session)
+    columns = models.FriendSuggestion.__table__.c
+    # Sorted so concurrent calls lock rows in the same order
+    pairs = sorted(increments)
+    for i in range(0, len(pairs), CHUNK_SIZE):
+        statement = insert(models.FriendSuggestion).values([
+            {"user_id": user_id, "candidate_id": candidate_id, "mutual_count": increments[(user_id, candidate_id)]}
+            for user_id, candidate_id in pairs[i:i + CHUNK_SIZE]
+        ])
+        # Incremented in SQL so concurrent add_friend calls never lose counts
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[columns.user_id, columns.candidate_id],
+                set_={"mutual_count": columns.mutual_count + statement.excluded.mutual_count},
+            )
+        )
+
+
+async def record_friendship(session: AsyncSession, user_id: int, friend_id: int):
+    """
+    Update mutual-friend counts for a new friendship between ``user_id`` and
+    ``friend_id``. Does not commit, so it lands in the caller's transaction,
+    which holds row locks on both users until it commits.
+    """
+    # Lock both users so add_friend calls sharing a user run one after the
+    # other; the later one then reads the earlier one's committed edges
+    await session.execute(
+        select(auth_models.User.id)
+        .where(auth_models.User.id.in_([user_id, friend_id]))
+        .order_by(auth_models.User.id)
+        .with_for_update()
+    )
+    neighbours = await _friend_ids(session, [user_id, friend_id])
+    increments: Counter = Counter()
+    for user, friend in ((user_id, friend_id), (friend_id, user_id)):
+        # ``user`` now shares ``friend`` with each of friend's other friends
+        for other in neighbours[friend] - {user}:
+            increments[(user, other)] += 1
+            increments[(other, user)] += 1
+    await _increment(session, increments)
+
+
+async def top_suggestions(
+    session: AsyncSession, user_id: int, limit: int
+) -> List[Tuple[auth_models.User, int]]:
+    already_friends = exists().where(
+        models.Friendship.user_id == user_id,
+        models.Friendship.friend_id == models.FriendSuggestion.candidate_id,
+    )
+    query = (
+        select(auth_models.User, models.FriendSuggestion.mutual_count)
+        .join(models.FriendSuggestion, models.FriendSuggestion.candidate_id == auth_models.User.id)
+        .where(
+            models.FriendSuggestion.user_id == user_id,
+            models.FriendSuggestion.mutual_count > 0,
+            ~already_friends,
+        )
+        .order_by(models.FriendSuggestion.mutual_count.desc(), models.FriendSuggestion.candidate_id)
+        .limit(limit)
+    )
+    result = await session.execute(query)
+    return result.all()
+
+
+async def rebuild_suggestions(session: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Recompute the candidate table from ``Friendship``, one batch of users at a
+    time. Returns the number of users processed.
+    """
+    direct = aliased(models.Friendship)
+    second = aliased(models.Friendship)
+    processed = 0
+    last_id = 0
+    while True:
+        users_query = (
+            select(auth_models.User.id)
+            .where(auth_models.User.id > last_id)
+            .order_by(auth_models.User.id)
+            .limit(batch_size)
+        )
+        user_ids = (await session.execute(users_query)).scalars().all()
+        if not user_ids:
+            return processed
+
+        mutual_query = (
+            select(direct.user_id, second.friend_id, func.count())
+            .join(second, second.user_id == direct.friend_id)
+            .where(direct.user_id.in_(user_ids), second.friend_id != direct.user_id)
+            .group_by(direct.user_id, second.friend_id)
+        )
+        rows = (await session.execute(mutual_query)).all()
+
+        await session.execute(
+            delete(models.FriendSuggestion).where(models.FriendSuggestion.user_id.in_(user_ids))
+        )
+        session.add_all(
+            models.FriendSuggestion(user_id=user_id, candidate_id=candidate_id, mutual_count=count)
+            for user_id, candidate_id, count in rows
+        )
+        await session.commit()
+
+        processed += len(user_ids)
+        last_id = user_ids[-1]
+
+
+async def main():
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        processed = await rebuild_suggestions(session)
+    logging.info(f"Rebuilt friend suggestions for {processed} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
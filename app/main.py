@@ -1,11 +1,16 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.compression import CompressionMiddleware
 from app.auth import router as auth_router
 from app.friends import router as friends_router
 from app.reminders import router as reminders_router
+from app.notifications.service import notifier
+from app.core.profiling import ProfilingMiddleware, slow_requests
+from app.admin import router as admin_router
 
 
 # Ensure models are imported for SQLModel metadata
@@ -20,15 +25,30 @@ app = FastAPI(title=settings.PROJECT_NAME)
 # Trust the X-Forwarded-Proto headers (Cloud Run)
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
 
+# gzip/brotli for larger responses, negotiated via Accept-Encoding
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 @app.on_event("startup")
 async def on_startup():
     await init_db()
+    app.state.notifier_task = asyncio.create_task(notifier.run())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.notifier_task.cancel()
+    # Pending coalesced and digest batches would otherwise be lost
+    await notifier.flush_all()
 
 app.include_router(auth_router.router)
 app.include_router(friends_router.router)
 app.include_router(reminders_router.router)
+app.include_router(admin_router.router)
 
 origins = [
     "http://localhost:8081",
@@ -43,6 +63,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so captured latencies cover the whole stack; a no-op while the
+# slow request threshold is 0
+app.add_middleware(ProfilingMiddleware, recorder=slow_requests)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Remind Anyone API"}
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.auth import models as auth_models
+
+EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+
+
+async def send_push(message: dict):
+    async with httpx.AsyncClient() as client:
+        response = await client.post(EXPO_PUSH_URL, json=message)
+        response.raise_for_status()
+        return response
+
+
+class PendingNotification:
+    def __init__(self, sender: str, title: str, reminder_id: int):
+        self.sender = sender
+        self.title = title
+        self.reminder_id = reminder_id
+
+
+class PendingBatch:
+    def __init__(self, token: str, due_at: float):
+        self.token = token
+        self.due_at = due_at
+        self.items: List[PendingNotification] = []
+
+
+class NotificationCoalescer:
+    """
+    Coalesces reminder push notifications per recipient.
+
+    In immediate mode the first notification goes out right away and anything
+    else arriving within ``window_seconds`` is merged into a single summary
+    push sent when the window closes. In digest mode nothing is sent right
+    away; notifications are collected for ``digest_seconds`` and delivered as
+    one summary.
+
+    ``clock`` and ``send`` are injectable so the timing can be tested without
+    sleeping or calling Expo.
+
+    Pending batches are kept in process memory and flushed by ``run``; they
+    survive a clean shutdown (``flush_all``) but not a crash, and are delayed
+    while the instance's CPU is throttled between requests.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        digest_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        send: Optional[Callable] = None,
+    ):
+        self.window_seconds = window_seconds
+        self.digest_seconds = digest_seconds
+        self._clock = clock
+        self._send = send or send_push
+        self._pending: Dict[int, PendingBatch] = {}
+        self._last_sent: Dict[int, float] = {}
+
+    def reset(self):
+        self._pending.clear()
+        self._last_sent.clear()
+
+    async def notify(self, recipient: auth_models.User, sender: str, title: str, reminder_id: int):
+        if not recipient.expo_push_token:
+            return
+
+        now = self._clock()
+        item = PendingNotification(sender, title, reminder_id)
+        digest = recipient.notification_mode == auth_models.NotificationMode.Digest
+        batch = self._pending.get(recipient.id)
+
+        if batch is None and not digest:
+            last_sent = self._last_sent.get(recipient.id)
+            if last_sent is None or now - last_sent >= self.window_seconds:
+                self._last_sent[recipient.id] = now
+                await self._deliver(recipient.expo_push_token, [item])
+                return
+
+        if batch is None:
+            if digest:
+                due_at = now + self.digest_seconds
+            else:
+                due_at = self._last_sent[recipient.id] + self.window_seconds
+            batch = PendingBatch(recipient.expo_push_token, due_at)
+            self._pending[recipient.id] = batch
+
+        # Always deliver to the most recently known device token
+        batch.token = recipient.expo_push_token
+        batch.items.append(item)
+
+    async def flush_due(self):
+        """Send every batch whose window has closed."""
+        now = self._clock()
+        for recipient_id in [rid for rid, b in self._pending.items() if b.due_at <= now]:
+            batch = self._pending.pop(recipient_id)
+            self._last_sent[recipient_id] = now
+            await self._deliver(batch.token, batch.items)
+
+        # Forget recipients whose window has long passed
+        expired = [rid for rid, sent in self._last_sent.items() if now - sent >= self.window_seconds]
+        for recipient_id in expired:
+            del self._last_sent[recipient_id]
+
+    async def flush_all(self):
+        """Send every pending batch now, e.g. before the process exits."""
+        now = self._clock()
+        pending, self._pending = self._pending, {}
+        for recipient_id, batch in pending.items():
+            self._last_sent[recipient_id] = now
+            await self._deliver(batch.token, batch.items)
+
+    async def run(self, interval: float = 1.0):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_due()
+            except Exception as e:
+                logging.error(f"Failed to flush pending notifications: {e}")
+
+    async def _deliver(self, token: str, items: List[PendingNotification]):
+        if len(items) == 1:
+            item = items[0]
+            message = {
+                "to": token,
+                "sound": "default",
+                "title": f"New Reminder from {item.sender}",
+                "body": item.title,
+                "data": {"reminderId": item.reminder_id},
+            }
+        else:
+            senders = list(dict.fromkeys(item.sender for item in items))
+            message = {
+                "to": token,
+                "sound": "default",
+                "title": f"{len(items)} new reminders from {', '.join(senders)}",
+                "body": ", ".join(item.title for item in items),
+                "data": {"reminderIds": [item.reminder_id for item in items]},
+            }
+        try:
+            response = await self._send(message)
+            logging.info(f"Push notification sent ({len(items)} reminders): {response.json()}")
+        except Exception as e:
+            logging.error(f"Failed to send push notification: {e}")
+
+
+notifier = NotificationCoalescer(
+    window_seconds=settings.NOTIFICATION_COALESCE_SECONDS,
+    digest_seconds=settings.NOTIFICATION_DIGEST_SECONDS,
+)
@@ -2,7 +2,7 @@ from typing import Optional
 from datetime import datetime
 from enum import Enum
 from sqlmodel import Field, SQLModel
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, Index
 
 class Severity(str, Enum):
     Low = "Low"
@@ -19,8 +19,16 @@ class ReminderBase(SQLModel):
     due_date: datetime = Field(sa_column=Column(DateTime(timezone=True)))
     severity: Severity = Severity.Medium
     status: ReminderStatus = ReminderStatus.Created
+    recurrence_rule: Optional[str] = None
+
+# Serves the overdue count in /reminders/stats
+recipient_status_due_date_index = Index(
+    "ix_reminder_recipient_status_due_date", "recipient_id", "status", "due_date"
+)
 
 class Reminder(ReminderBase, table=True):
+    __table_args__ = (recipient_status_due_date_index,)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     creator_id: int = Field(foreign_key="user.id")
     recipient_id: int = Field(foreign_key="user.id")
@@ -35,6 +43,7 @@ class ReminderCreate(SQLModel):
     due_date: datetime
     severity: Severity = Severity.Medium
     recipient_id: int
+    recurrence_rule: Optional[str] = None
 
 class ReminderUpdate(SQLModel):
     title: Optional[str] = None
@@ -42,9 +51,41 @@ class ReminderUpdate(SQLModel):
     due_date: Optional[datetime] = None
     severity: Optional[Severity] = None
     status: Optional[ReminderStatus] = None
+    recurrence_rule: Optional[str] = None
 
 class ReminderRead(ReminderBase):
     id: int
     creator_id: int
     recipient_id: int
     created_at: datetime
+    occurrence_date: Optional[datetime] = None
+
+class ReminderOccurrence(SQLModel, table=True):
+    """
+    Per-occurrence state of a recurring reminder, stored only when it differs
+    from the series default (i.e. sparse exceptions).
+    """
+    reminder_id: int = Field(foreign_key="reminder.id", primary_key=True)
+    occurrence_date: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), primary_key=True)
+    )
+    status: ReminderStatus = ReminderStatus.Completed
+
+class ReminderOccurrenceUpdate(SQLModel):
+    occurrence_date: datetime
+    status: ReminderStatus
+
+class ReminderStats(SQLModel, table=True):
+    """Per-user counters, updated in the same transaction as reminder writes."""
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    sent: int = 0
+    received: int = 0
+    open: int = 0
+    completed: int = 0
+
+class ReminderStatsRead(SQLModel):
+    sent: int
+    received: int
+    open: int
+    completed: int
+    overdue: int
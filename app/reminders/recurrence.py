@@ -0,0 +1,177 @@
+"""
+Recurrence rules for reminders.
+
+A recurring reminder is stored as a single ``Reminder`` row whose ``due_date``
+is the first occurrence and whose ``recurrence_rule`` describes the series.
+Occurrences are never materialized; they are generated on demand for the
+window a client asks for.
+
+Supported rules are the shorthands ``DAILY``, ``WEEKLY`` and ``MONTHLY`` and
+an RRULE-like subset: ``FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10;UNTIL=20261231T000000Z``.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, Tuple
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+# COUNT series are walked from their first occurrence, so keep them bounded
+MAX_COUNT = 10000
+# Larger intervals would step past the largest representable date at once
+MAX_INTERVAL = 1000
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    byday: Tuple[int, ...] = ()
+
+
+def as_utc(value: datetime) -> datetime:
+    """Return an aware UTC datetime; naive values are assumed to be UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse_until(value: str) -> datetime:
+    for fmt in ("%Y%m%dT%H%M%SZ", "%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            return as_utc(datetime.strptime(value, fmt))
+        except ValueError:
+            pass
+    return as_utc(datetime.fromisoformat(value))
+
+
+def parse_rule(rule: str) -> RecurrenceRule:
+    """Parse a recurrence rule string, raising ``ValueError`` if it is invalid."""
+    rule = rule.strip().upper()
+    if rule.startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    if "=" not in rule:
+        rule = f"FREQ={rule}"
+
+    parts = {}
+    for part in filter(None, rule.split(";")):
+        key, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed recurrence rule part: {part!r}")
+        parts[key] = value
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+
+    try:
+        interval = int(parts.pop("INTERVAL", 1))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        until = _parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+    except ValueError:
+        raise ValueError("INTERVAL, COUNT and UNTIL must be well-formed")
+    parts.pop("COUNT", None)
+    parts.pop("UNTIL", None)
+
+    if not 1 <= interval <= MAX_INTERVAL:
+        raise ValueError(f"INTERVAL must be between 1 and {MAX_INTERVAL}")
+    if count is not None and not 1 <= count <= MAX_COUNT:
+        raise ValueError(f"COUNT must be between 1 and {MAX_COUNT}")
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot be combined")
+
+    byday: Tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            byday = tuple(sorted({WEEKDAYS[day] for day in parts.pop("BYDAY").split(",")}))
+        except KeyError:
+            raise ValueError(f"BYDAY days must be among {', '.join(WEEKDAYS)}")
+
+    if parts:
+        raise ValueError(f"Unsupported recurrence rule parts: {', '.join(sorted(parts))}")
+
+    return RecurrenceRule(freq=freq, interval=interval, count=count, until=until, byday=byday)
+
+
+def _period_anchor(start: datetime, rule: RecurrenceRule, index: int) -> Optional[datetime]:
+    """Earliest instant period ``index`` can produce an occurrence at."""
+    if rule.freq == "DAILY":
+        return start + timedelta(days=index * rule.interval)
+    if rule.freq == "WEEKLY":
+        week_start = start - timedelta(days=start.weekday()) if rule.byday else start
+        return week_start + timedelta(weeks=index * rule.interval)
+    year, month = divmod(start.month - 1 + index * rule.interval, 12)
+    return start.replace(year=start.year + year, month=month + 1, day=1)
+
+
+def _period_occurrences(start: datetime, rule: RecurrenceRule, anchor: datetime) -> Iterator[datetime]:
+    if rule.freq == "WEEKLY" and rule.byday:
+        for day in rule.byday:
+            yield anchor + timedelta(days=day)
+    elif rule.freq == "MONTHLY":
+        # Months without the start day (e.g. the 31st) are skipped, as in RFC 5545.
+        try:
+            yield anchor.replace(day=start.day)
+        except ValueError:
+            return
+    else:
+        yield anchor
+
+
+def _first_period(start: datetime, rule: RecurrenceRule, window_start: datetime) -> int:
+    """Index of the first period that may reach ``window_start``."""
+    if window_start <= start:
+        return 0
+    if rule.freq == "MONTHLY":
+        months = (window_start.year - start.year) * 12 + window_start.month - start.month
+        return max(0, months // rule.interval)
+    period = timedelta(days=rule.interval * (7 if rule.freq == "WEEKLY" else 1))
+    return max(0, (window_start - _period_anchor(start, rule, 0)) // period)
+
+
+def iter_occurrences(
+    start: datetime,
+    rule: RecurrenceRule,
+    window_start: datetime,
+    window_end: datetime,
+) -> Iterator[datetime]:
+    """
+    Lazily yield the occurrences of a series inside ``[window_start, window_end)``.
+
+    Without ``COUNT`` the generator jumps straight to the window, so the cost
+    depends on the window size rather than on how old the series is.
+    """
+    start, window_start, window_end = as_utc(start), as_utc(window_start), as_utc(window_end)
+    # COUNT is relative to the first occurrence, so every period has to be walked.
+    try:
+        index = 0 if rule.count is not None else _first_period(start, rule, window_start)
+    except OverflowError:
+        return
+    emitted = 0
+
+    while True:
+        try:
+            anchor = _period_anchor(start, rule, index)
+            occurrences = list(_period_occurrences(start, rule, anchor))
+        except (OverflowError, ValueError):
+            # The series ran past the largest representable date
+            return
+        if anchor >= window_end:
+            return
+        for occurrence in occurrences:
+            if occurrence < start:
+                continue
+            if rule.until is not None and occurrence > rule.until:
+                return
+            if rule.count is not None:
+                if emitted >= rule.count:
+                    return
+                emitted += 1
+            if occurrence >= window_end:
+                return
+            if occurrence >= window_start:
+                yield occurrence
+        index += 1
@@ -1,24 +1,77 @@
-from typing import Annotated, List
-import httpx
-import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import select, or_
+from typing import Annotated, List, Optional
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from sqlmodel import select, or_, and_
+from sqlalchemy import delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_session
+from app.core import idempotency
+from app.core.cache import response_cache, render_json
+from app.core.fields import parse_fields
 from app.auth import models as auth_models
 from app.auth import dependencies as auth_deps
 from app.friends import models as friend_models
-from app.reminders import models
+from app.reminders import models, recurrence, search, stats
+from app.notifications.service import notifier
 
 router = APIRouter(prefix="/reminders", tags=["reminders"])
 
+# Longest start/end window list_reminders expands recurring reminders over
+MAX_LIST_WINDOW = timedelta(days=366)
+
+# Columns needed to expand recurring reminders over a window
+EXPANSION_COLUMNS = ("id", "due_date", "status", "recurrence_rule")
+
+def _validate_recurrence_rule(rule: Optional[str]):
+    if rule is None:
+        return
+    try:
+        recurrence.parse_rule(rule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid recurrence rule: {str(e)}")
+
+def _stored_rule(rule: str) -> Optional[recurrence.RecurrenceRule]:
+    # Rules stored before a validation limit was added may no longer parse
+    try:
+        return recurrence.parse_rule(rule)
+    except ValueError:
+        return None
+
+def _occurrence_read(
+    reminder: models.Reminder,
+    occurrence_date: datetime,
+    occurrence_status: models.ReminderStatus,
+) -> models.ReminderRead:
+    data = reminder.dict()
+    data.update(due_date=occurrence_date, occurrence_date=occurrence_date, status=occurrence_status)
+    return models.ReminderRead(**data)
+
 @router.post("/", response_model=models.ReminderRead)
 async def create_reminder(
     reminder_data: models.ReminderCreate,
     current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)],
+    idempotency_key: Annotated[Optional[str], Header()] = None,
 ):
+    """
+    Send a reminder to a friend. Retries carrying the same ``Idempotency-Key``
+    get the original response instead of creating (and pushing) a duplicate.
+    """
+    return await idempotency.run_idempotent(
+        idempotency_key,
+        current_user.id,
+        "POST /reminders",
+        reminder_data,
+        lambda: _create_reminder(reminder_data, current_user, session),
+        models.ReminderRead,
+    )
+
+async def _create_reminder(
+    reminder_data: models.ReminderCreate,
+    current_user: auth_models.User,
+    session: AsyncSession,
+) -> models.Reminder:
     # Check if recipient is friend
     # Assuming friendship is symmetric/bidirectional rows exist
     friend_query = select(friend_models.Friendship).where(
@@ -28,6 +81,8 @@ async def create_reminder(
     result = await session.execute(friend_query)
     if not result.scalars().first():
          raise HTTPException(status_code=400, detail="You can only send reminders to friends")
+
+    _validate_recurrence_rule(reminder_data.recurrence_rule)
          
     reminder = models.Reminder(
         **reminder_data.dict(),
@@ -35,46 +90,156 @@ async def create_reminder(
         status=models.ReminderStatus.Created
     )
     session.add(reminder)
+    await stats.apply_deltas(session, stats.reminder_deltas(reminder))
     await session.commit()
     await session.refresh(reminder)
+    response_cache.bump(reminder.creator_id, reminder.recipient_id)
 
-    # Send Push Notification if recipient has a token
+    # Send Push Notification if recipient has a token; bursts to the same
+    # recipient are coalesced by the notifier
     # Retrieve recipient to get token
     recipient_result = await session.execute(select(auth_models.User).where(auth_models.User.id == reminder_data.recipient_id))
     recipient = recipient_result.scalars().first()
 
-    if recipient and recipient.expo_push_token:
-        try:
-            async with httpx.AsyncClient() as client:
-                message = {
-                    "to": recipient.expo_push_token,
-                    "sound": "default",
-                    "title": f"New Reminder from {current_user.username}",
-                    "body": reminder.title,
-                    "data": {"reminderId": reminder.id},
-                }
-                response = await client.post("https://exp.host/--/api/v2/push/send", json=message)
-                response.raise_for_status()
-                logging.info(f"Push notification sent to {recipient.username}: {response.json()}")
-        except Exception as e:
-            logging.error(f"Failed to send push notification: {e}")
+    if recipient:
+        await notifier.notify(recipient, current_user.username, reminder.title, reminder.id)
 
     return reminder
 
+@router.get("/stats", response_model=models.ReminderStatsRead)
+async def get_reminder_stats(
+    current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+):
+    """
+    Sent, received, open, completed and overdue counts for the current user.
+    A recurring series counts as a single reminder.
+    """
+    return await stats.get_stats(session, current_user.id)
+
+@router.get("/search", response_model=List[models.ReminderRead])
+async def search_reminders(
+    q: Annotated[str, Query(min_length=1)],
+    current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0)] = 0,
+):
+    """
+    Full-text search over titles and descriptions of sent and received
+    reminders, best matches first.
+    """
+    return await search.search_reminders(session, current_user.id, q, limit, offset)
+
 @router.get("/", response_model=List[models.ReminderRead])
 async def list_reminders(
-    current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
+    request: Request,
+    user_id: Annotated[int, Depends(auth_deps.get_current_user_id)],
     session: Annotated[AsyncSession, Depends(get_session)],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fields: Optional[str] = None,
 ):
+    """
+    List sent and received reminders.
+
+    When a ``start``/``end`` window is given, recurring reminders are expanded
+    into their occurrences inside that window only; otherwise each series is
+    returned once, as stored.
+
+    ``fields=title,due_date`` restricts both the selected columns and the
+    returned keys (``id`` is always included).
+
+    Responses are served from the per-user cache until the user's reminders
+    change.
+    """
+    cache_key = response_cache.key(user_id, "reminders", request.query_params)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    current_user = await auth_deps.load_user(session, user_id)
+
+    windowed = start is not None or end is not None
+    if windowed:
+        if start is None or end is None:
+            raise HTTPException(status_code=400, detail="start and end must be given together")
+        start, end = recurrence.as_utc(start), recurrence.as_utc(end)
+        if end <= start:
+            raise HTTPException(status_code=400, detail="end must be after start")
+        if end - start > MAX_LIST_WINDOW:
+            raise HTTPException(status_code=400, detail=f"Window cannot exceed {MAX_LIST_WINDOW.days} days")
+
+    reminder_columns = models.Reminder.__table__.columns.keys()
+    requested = parse_fields(fields, reminder_columns)
+    selected = requested or reminder_columns
+    if windowed:
+        # Expansion needs these even if the client did not ask for them
+        selected = list(dict.fromkeys([*selected, *EXPANSION_COLUMNS]))
+
     # List sent and received
-    query = select(models.Reminder).where(
+    query = select(*(getattr(models.Reminder, name) for name in selected)).where(
         or_(
             models.Reminder.creator_id == current_user.id,
             models.Reminder.recipient_id == current_user.id
         )
     )
+    if windowed:
+        query = query.where(
+            or_(
+                and_(
+                    models.Reminder.recurrence_rule.is_(None),
+                    models.Reminder.due_date >= start,
+                    models.Reminder.due_date < end,
+                ),
+                and_(
+                    models.Reminder.recurrence_rule.is_not(None),
+                    models.Reminder.due_date < end,
+                ),
+            )
+        )
     result = await session.execute(query)
-    return result.scalars().all()
+    items = [dict(row._mapping) for row in result]
+
+    if windowed:
+        items = await _expand_window(session, items, start, end)
+
+    if requested is None:
+        content = [models.ReminderRead.model_validate(item) for item in items]
+    else:
+        keys = requested + ["occurrence_date"] if windowed else requested
+        content = [{key: item.get(key) for key in keys} for item in items]
+    return response_cache.put(cache_key, render_json(content))
+
+async def _expand_window(session: AsyncSession, rows: List[dict], start: datetime, end: datetime) -> List[dict]:
+    # Only the exceptions falling inside the window are loaded.
+    series_ids = [row["id"] for row in rows if row["recurrence_rule"]]
+    exceptions = {}
+    if series_ids:
+        exceptions_query = select(models.ReminderOccurrence).where(
+            models.ReminderOccurrence.reminder_id.in_(series_ids),
+            models.ReminderOccurrence.occurrence_date >= start,
+            models.ReminderOccurrence.occurrence_date < end,
+        )
+        exceptions_result = await session.execute(exceptions_query)
+        exceptions = {
+            (o.reminder_id, recurrence.as_utc(o.occurrence_date)): o.status
+            for o in exceptions_result.scalars().all()
+        }
+
+    items = []
+    for row in rows:
+        if not row["recurrence_rule"]:
+            items.append(row)
+            continue
+        rule = _stored_rule(row["recurrence_rule"])
+        if rule is None:
+            continue
+        for occurrence_date in recurrence.iter_occurrences(row["due_date"], rule, start, end):
+            occurrence_status = exceptions.get((row["id"], occurrence_date), models.ReminderStatus.Created)
+            items.append({**row, "due_date": occurrence_date, "occurrence_date": occurrence_date, "status": occurrence_status})
+
+    items.sort(key=lambda item: recurrence.as_utc(item["due_date"]))
+    return items
 
 @router.put("/{reminder_id}", response_model=models.ReminderRead)
 async def update_reminder(
@@ -117,15 +282,93 @@ async def update_reminder(
         # Check if user is allowed to update non-status fields (must be creator)
         if not is_creator:
              raise HTTPException(status_code=403, detail="Only creator can update reminder details")
+
+    if "recurrence_rule" in update_data:
+        _validate_recurrence_rule(update_data["recurrence_rule"])
     
+    old_status = reminder.status
+    new_status = update_data.pop("status", old_status)
+    # Exceptions are keyed by occurrence date, so they only fit the old series
+    reschedules = (
+        "recurrence_rule" in update_data and update_data["recurrence_rule"] != reminder.recurrence_rule
+    ) or (
+        update_data.get("due_date") is not None
+        and recurrence.as_utc(update_data["due_date"]) != recurrence.as_utc(reminder.due_date)
+    )
     for key, value in update_data.items():
         setattr(reminder, key, value)
         
+    if reschedules:
+        await session.execute(
+            delete(models.ReminderOccurrence).where(models.ReminderOccurrence.reminder_id == reminder.id)
+        )
     session.add(reminder)
+    if new_status != old_status:
+        # Conditional, so of two concurrent identical status changes only one
+        # matches a row and moves the counters
+        result = await session.execute(
+            update(models.Reminder.__table__)
+            .where(models.Reminder.id == reminder.id, models.Reminder.status == old_status)
+            .values(status=new_status)
+        )
+        if result.rowcount == 1:
+            await stats.apply_deltas(session, stats.status_change_deltas(reminder, old_status, new_status))
     await session.commit()
     await session.refresh(reminder)
+    response_cache.bump(reminder.creator_id, reminder.recipient_id)
     return reminder
 
+@router.put("/{reminder_id}/occurrences", response_model=models.ReminderRead)
+async def update_reminder_occurrence(
+    reminder_id: int,
+    occurrence_update: models.ReminderOccurrenceUpdate,
+    current_user: Annotated[auth_models.User, Depends(auth_deps.get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+):
+    """
+    Update the status of a single occurrence of a recurring reminder.
+    Only the recipient can do this; only non-default statuses are stored.
+    """
+    query = select(models.Reminder).where(models.Reminder.id == reminder_id)
+    result = await session.execute(query)
+    reminder = result.scalars().first()
+
+    if not reminder:
+        raise HTTPException(status_code=404, detail="Reminder not found")
+
+    if reminder.recipient_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only recipient can update status")
+
+    if not reminder.recurrence_rule:
+        raise HTTPException(status_code=400, detail="Reminder is not recurring")
+
+    occurrence_date = recurrence.as_utc(occurrence_update.occurrence_date)
+    rule = _stored_rule(reminder.recurrence_rule)
+    if rule is None:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    try:
+        window_end = occurrence_date + timedelta(microseconds=1)
+    except OverflowError:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    if next(recurrence.iter_occurrences(reminder.due_date, rule, occurrence_date, window_end), None) is None:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+
+    await session.execute(
+        delete(models.ReminderOccurrence).where(
+            models.ReminderOccurrence.reminder_id == reminder.id,
+            models.ReminderOccurrence.occurrence_date == occurrence_date,
+        )
+    )
+    if occurrence_update.status != models.ReminderStatus.Created:
+        session.add(models.ReminderOccurrence(
+            reminder_id=reminder.id,
+            occurrence_date=occurrence_date,
+            status=occurrence_update.status,
+        ))
+    await session.commit()
+    response_cache.bump(reminder.creator_id, reminder.recipient_id)
+    return _occurrence_read(reminder, occurrence_date, occurrence_update.status)
+
 @router.delete("/{reminder_id}")
 async def delete_reminder(
     reminder_id: int,
@@ -142,6 +385,11 @@ async def delete_reminder(
     if reminder.creator_id != current_user.id:
          raise HTTPException(status_code=403, detail="Only creator can delete reminder")
          
+    await session.execute(
+        delete(models.ReminderOccurrence).where(models.ReminderOccurrence.reminder_id == reminder.id)
+    )
+    await stats.apply_deltas(session, stats.reminder_deltas(reminder, sign=-1))
     await session.delete(reminder)
     await session.commit()
+    response_cache.bump(reminder.creator_id, reminder.recipient_id)
     return {"ok": True}
@@ -0,0 +1,134 @@
+"""
+Full-text search over reminder titles and descriptions.
+
+On Postgres the ``reminder`` table gets a generated ``search_vector`` tsvector
+column with a GIN index; on SQLite (local runs and tests) an external-content
+FTS5 table kept in sync by triggers. Either way the index follows every
+insert, update and delete of a reminder without any application code.
+"""
+from typing import List
+
+from sqlmodel import select, or_
+from sqlalchemy import column, event, func, literal_column, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.reminders import models
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE reminder ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reminder_search_vector ON reminder USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reminder_fts
+    USING fts5(title, description, content='reminder', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reminder_fts_insert AFTER INSERT ON reminder BEGIN
+        INSERT INTO reminder_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reminder_fts_delete AFTER DELETE ON reminder BEGIN
+        INSERT INTO reminder_fts(reminder_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reminder_fts_update AFTER UPDATE OF title, description ON reminder BEGIN
+        INSERT INTO reminder_fts(reminder_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO reminder_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# Title matches rank above description matches
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def create_search_index(connection: Connection):
+    """Create the dialect's search structures; safe to run repeatedly."""
+    if connection.dialect.name == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.execute(text(statement))
+    elif connection.dialect.name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reminder_fts'")
+        ).first()
+        for statement in SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Index rows that existed before the FTS table did
+            connection.execute(text("INSERT INTO reminder_fts(reminder_fts) VALUES ('rebuild')"))
+
+
+def drop_search_index(connection: Connection):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS reminder_fts"))
+
+
+@event.listens_for(models.Reminder.__table__, "after_create")
+def _after_reminder_create(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(models.Reminder.__table__, "before_drop")
+def _before_reminder_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input cannot use FTS5 query syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+
+async def search_reminders(
+    session: AsyncSession, user_id: int, q: str, limit: int, offset: int
+) -> List[models.Reminder]:
+    """Ranked search over reminders the user created or received."""
+    if not q.split():
+        return []
+
+    visible = or_(
+        models.Reminder.creator_id == user_id,
+        models.Reminder.recipient_id == user_id,
+    )
+    if session.bind.dialect.name == "postgresql":
+        search_vector = literal_column("reminder.search_vector")
+        ts_query = func.plainto_tsquery("simple", q)
+        query = (
+            select(models.Reminder)
+            .where(search_vector.op("@@")(ts_query), visible)
+            .order_by(
+                func.ts_rank(search_vector, ts_query).desc(),
+                models.Reminder.id.desc(),
+            )
+        )
+    else:
+        fts = table("reminder_fts", column("rowid"))
+        fts_table = literal_column("reminder_fts")
+        query = (
+            select(models.Reminder)
+            .join(fts, fts.c.rowid == models.Reminder.id)
+            .where(fts_table.op("MATCH")(_fts5_query(q)), visible)
+            # bm25 scores are negative; lower is a better match
+            .order_by(
+                func.bm25(fts_table, TITLE_WEIGHT, DESCRIPTION_WEIGHT),
+                models.Reminder.id.desc(),
+            )
+        )
+
+    result = await session.execute(query.limit(limit).offset(offset))
+    return result.scalars().all()
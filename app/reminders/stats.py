@@ -0,0 +1,161 @@
+"""
+Incrementally maintained per-user reminder counters.
+
+The reminder router applies deltas in the same transaction as the change it
+records, so reading stats is a single primary-key lookup. Overdue reminders
+depend on the current time and are counted from the
+(recipient_id, status, due_date) index instead.
+
+A recurring series counts once, by its series status; completing single
+occurrences is not reflected in ``open``/``completed``.
+
+Counters that drift (e.g. rows written outside the API) can be repaired with::
+
+    python -m app.reminders.stats
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict
+
+from sqlmodel import select
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import engine, upsert_insert
+from app.auth import models as auth_models
+from app.reminders import models
+
+COUNTERS = ("sent", "received", "open", "completed")
+
+STATUS_COUNTERS = {
+    models.ReminderStatus.Created: "open",
+    models.ReminderStatus.Completed: "completed",
+}
+
+Deltas = Dict[int, Counter]
+
+
+def reminder_deltas(reminder: models.Reminder, sign: int = 1) -> Deltas:
+    """Counter changes caused by adding (``sign=1``) or removing (``sign=-1``) a reminder."""
+    deltas: Deltas = defaultdict(Counter)
+    deltas[reminder.creator_id]["sent"] += sign
+    deltas[reminder.recipient_id]["received"] += sign
+    deltas[reminder.recipient_id][STATUS_COUNTERS[reminder.status]] += sign
+    return deltas
+
+
+def status_change_deltas(
+    reminder: models.Reminder,
+    old_status: models.ReminderStatus,
+    new_status: models.ReminderStatus,
+) -> Deltas:
+    deltas: Deltas = defaultdict(Counter)
+    if old_status != new_status:
+        deltas[reminder.recipient_id][STATUS_COUNTERS[old_status]] -= 1
+        deltas[reminder.recipient_id][STATUS_COUNTERS[new_status]] += 1
+    return deltas
+
+
+async def apply_deltas(session: AsyncSession, deltas: Deltas):
+    """
+    Apply counter deltas without committing, so they land in the caller's
+    transaction.
+    """
+    insert = upsert_insert(session)
+    columns = models.ReminderStats.__table__.c
+    for user_id, counter in deltas.items():
+        changes = {name: value for name, value in counter.items() if value}
+        if not changes:
+            continue
+        # Atomic increment; creates the row on a user's first write
+        statement = insert(models.ReminderStats).values(
+            user_id=user_id, **{name: changes.get(name, 0) for name in COUNTERS}
+        )
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[columns.user_id],
+                set_={name: columns[name] + value for name, value in changes.items()},
+            )
+        )
+
+
+async def get_stats(session: AsyncSession, user_id: int) -> models.ReminderStatsRead:
+    # Counters are updated with Core statements, so bypass the identity map
+    stats = await session.get(models.ReminderStats, user_id, populate_existing=True)
+    overdue_query = select(func.count()).select_from(models.Reminder).where(
+        models.Reminder.recipient_id == user_id,
+        models.Reminder.status == models.ReminderStatus.Created,
+        models.Reminder.due_date < datetime.now(timezone.utc),
+        models.Reminder.recurrence_rule.is_(None),
+    )
+    overdue = (await session.execute(overdue_query)).scalar_one()
+    return models.ReminderStatsRead(
+        sent=stats.sent if stats else 0,
+        received=stats.received if stats else 0,
+        open=stats.open if stats else 0,
+        completed=stats.completed if stats else 0,
+        overdue=overdue,
+    )
+
+
+async def rebuild_stats(session: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Recompute counters from the reminder table, one batch of users at a time.
+    Returns the number of users processed.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        users_query = (
+            select(auth_models.User.id)
+            .where(auth_models.User.id > last_id)
+            .order_by(auth_models.User.id)
+            .limit(batch_size)
+        )
+        user_ids = (await session.execute(users_query)).scalars().all()
+        if not user_ids:
+            return processed
+
+        counts: Deltas = defaultdict(Counter)
+        sent_query = (
+            select(models.Reminder.creator_id, func.count())
+            .where(models.Reminder.creator_id.in_(user_ids))
+            .group_by(models.Reminder.creator_id)
+        )
+        for user_id, count in await session.execute(sent_query):
+            counts[user_id]["sent"] = count
+
+        received_query = (
+            select(models.Reminder.recipient_id, models.Reminder.status, func.count())
+            .where(models.Reminder.recipient_id.in_(user_ids))
+            .group_by(models.Reminder.recipient_id, models.Reminder.status)
+        )
+        for user_id, status, count in await session.execute(received_query):
+            counts[user_id]["received"] += count
+            counts[user_id][STATUS_COUNTERS[models.ReminderStatus(status)]] += count
+
+        existing_query = select(models.ReminderStats).where(models.ReminderStats.user_id.in_(user_ids))
+        existing = {s.user_id: s for s in (await session.execute(existing_query)).scalars().all()}
+        for user_id in user_ids:
+            stats = existing.get(user_id) or models.ReminderStats(user_id=user_id)
+            for name in COUNTERS:
+                setattr(stats, name, counts[user_id][name])
+            session.add(stats)
+        await session.commit()
+
+        processed += len(user_ids)
+        last_id = user_ids[-1]
+
+
+async def main():
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        processed = await rebuild_stats(session)
+    logging.info(f"Rebuilt reminder stats for {processed} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
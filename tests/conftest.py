@@ -8,6 +8,10 @@ from app.main import app
 from app.core.database import get_session
 from app.auth import models as auth_models
 from app.core import security
+from app.core.config import settings
+from app.notifications.service import notifier
+from app.core import idempotency
+from app.core.cache import response_cache
 
 from sqlalchemy.pool import StaticPool
 
@@ -46,6 +50,9 @@ async def client_fixture(session: AsyncSession):
         return session
     
     app.dependency_overrides[get_session] = get_session_override
+    notifier.reset()
+    idempotency.store.reset()
+    response_cache.reset()
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -69,3 +76,8 @@ async def test_user_fixture(session: AsyncSession):
 def auth_headers_fixture(test_user: auth_models.User):
     access_token = security.create_access_token(subject=test_user.id)
     return {"Authorization": f"Bearer {access_token}"}
+
+@pytest.fixture(name="admin_headers")
+def admin_headers_fixture(auth_headers, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user.email])
+    return auth_headers
@@ -0,0 +1,34 @@
+import itertools
+from httpx import AsyncClient
+from app.core.profiling import slow_requests
+
+async def test_admin_endpoints_require_admin(client: AsyncClient, auth_headers: dict):
+    response = await client.get("/admin/slow-requests", headers=auth_headers)
+    assert response.status_code == 403
+
+async def test_profile_returns_collapsed_stacks(client: AsyncClient, admin_headers: dict):
+    response = await client.post("/admin/profile", params={"seconds": 0.1}, headers=admin_headers)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert ";" in stack
+    assert int(count) > 0
+
+async def test_slow_requests_are_captured_with_sql(client: AsyncClient, admin_headers: dict, monkeypatch):
+    # Every reading of the clock is a second later, so every request is slow
+    monkeypatch.setattr(slow_requests, "_clock", itertools.count(step=1.0).__next__)
+    try:
+        response = await client.put("/admin/slow-requests/settings", json={"threshold_ms": 1}, headers=admin_headers)
+        assert response.status_code == 200
+
+        await client.get("/reminders/stats", headers=admin_headers)
+
+        response = await client.get("/admin/slow-requests", headers=admin_headers)
+        records = [r for r in response.json() if r["path"] == "/reminders/stats"]
+        assert len(records) == 1
+        assert records[0]["duration_ms"] > 0
+        assert any("reminder" in q["statement"] for q in records[0]["sql"])
+    finally:
+        slow_requests.configure(0)
+        slow_requests.records.clear()
@@ -0,0 +1,74 @@
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import QueryParams
+from app.auth import models as auth_models
+from app.core.cache import ResponseCache, response_cache
+
+async def test_list_cache_is_disabled_by_default(client: AsyncClient, auth_headers: dict):
+    await client.get("/friends/", headers=auth_headers)
+    second = await client.get("/friends/", headers=auth_headers)
+    assert second.headers["x-cache"] == "MISS"
+
+async def test_friend_list_is_cached_until_a_write(client: AsyncClient, admin_headers: dict, session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(response_cache, "max_bytes", 1024 * 1024)
+    session.add(auth_models.User(email="cached@example.com", username="cached", full_name="Cached"))
+    await session.commit()
+
+    first = await client.get("/friends/", headers=admin_headers)
+    second = await client.get("/friends/", headers=admin_headers)
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == []
+
+    # add_friend bumps the user's version
+    response = await client.post("/friends/", json={"friend_email_or_username": "cached"}, headers=admin_headers)
+    assert response.status_code == 200
+    third = await client.get("/friends/", headers=admin_headers)
+    assert third.headers["x-cache"] == "MISS"
+    assert [f["username"] for f in third.json()] == ["cached"]
+
+    assert (await client.get("/cache/stats")).status_code == 404
+    stats = (await client.get("/admin/cache/stats", headers=admin_headers)).json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["bytes"] == len(third.content)
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=10, ttl_seconds=60)
+    a = cache.key(1, "reminders", QueryParams("fields=a"))
+    b = cache.key(1, "reminders", QueryParams("fields=b"))
+    c = cache.key(2, "reminders", QueryParams(""))
+    cache.put(a, b"aaaa")
+    cache.put(b, b"bbbb")
+    assert cache.get(a) is not None
+    cache.put(c, b"cccc")
+
+    assert cache.get(b) is None
+    assert cache.get(a) is not None
+    assert cache.stats()["bytes"] == 8
+    assert cache.stats()["evictions"] == 1
+
+def test_bump_invalidates_only_that_user():
+    cache = ResponseCache(max_bytes=100, ttl_seconds=60)
+    mine = cache.key(1, "friends", QueryParams(""))
+    theirs = cache.key(2, "friends", QueryParams(""))
+    cache.put(mine, b"[]")
+    cache.put(theirs, b"[]")
+
+    cache.bump(1)
+    assert cache.get(cache.key(1, "friends", QueryParams(""))) is None
+    assert cache.get(theirs) is not None
+    # A response computed before the bump is not stored
+    cache.put(mine, b"[]")
+    assert cache.stats()["entries"] == 1
+
+def test_entries_expire_after_ttl():
+    now = [0.0]
+    cache = ResponseCache(max_bytes=100, ttl_seconds=60, clock=lambda: now[0])
+    key = cache.key(1, "friends", QueryParams(""))
+    cache.put(key, b"[]")
+    now[0] = 59
+    assert cache.get(key) is not None
+    now[0] = 60
+    assert cache.get(key) is None
+    assert cache.stats()["bytes"] == 0
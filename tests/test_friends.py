@@ -2,6 +2,9 @@ from httpx import AsyncClient
 from app.auth import models as auth_models
 from app.friends import models as friend_models
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.friends import suggestions
+from app.core import security
 
 async def test_add_friend(client: AsyncClient, auth_headers: dict, session: AsyncSession):
     # Create another user to add as friend
@@ -36,3 +39,44 @@ async def test_list_friends(client: AsyncClient, auth_headers: dict, session: As
     assert len(data) >= 1
     emails = [f["email"] for f in data]
     assert "friend2@example.com" in emails
+
+    response = await client.get("/friends/", params={"fields": "username"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [{"id": friend.id, "username": "friend2"}]
+
+async def test_friend_suggestions(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    users = {}
+    for name in ("alice", "bob", "carol"):
+        user = auth_models.User(email=f"{name}@example.com", username=name, full_name=name.title())
+        session.add(user)
+        users[name] = user
+    await session.commit()
+
+    def headers_for(user):
+        return {"Authorization": f"Bearer {security.create_access_token(subject=user.id)}"}
+
+    # testuser - alice, testuser - bob, carol - alice, carol - bob
+    for friend in ("alice", "bob"):
+        response = await client.post("/friends/", json={"friend_email_or_username": friend}, headers=auth_headers)
+        assert response.status_code == 200
+        response = await client.post("/friends/", json={"friend_email_or_username": friend}, headers=headers_for(users["carol"]))
+        assert response.status_code == 200
+
+    response = await client.get("/friends/suggestions", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [(d["username"], d["mutual_friends"]) for d in data] == [("carol", 2)]
+    assert "email" not in data[0]
+    assert "expo_push_token" not in data[0]
+    assert "notification_mode" not in data[0]
+
+    # Friends are no longer suggested; the rebuild job yields the same table
+    await client.post("/friends/", json={"friend_email_or_username": "carol"}, headers=auth_headers)
+    response = await client.get("/friends/suggestions", headers=auth_headers)
+    assert response.json() == []
+
+    before = (await session.execute(select(friend_models.FriendSuggestion))).scalars().all()
+    before = {(s.user_id, s.candidate_id, s.mutual_count) for s in before}
+    await suggestions.rebuild_suggestions(session, batch_size=2)
+    after = (await session.execute(select(friend_models.FriendSuggestion))).scalars().all()
+    assert {(s.user_id, s.candidate_id, s.mutual_count) for s in after} == before
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+from httpx import AsyncClient
+from sqlmodel import SQLModel, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.auth import models as auth_models
+from app.friends import models as friend_models
+from app.reminders import models as reminder_models
+from app.core.idempotency import DatabaseIdempotencyStore, MemoryIdempotencyStore, StoredResponse
+
+async def test_create_reminder_retry_is_replayed(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    friend = auth_models.User(email="retry@example.com", username="retry", full_name="Retry")
+    session.add(friend)
+    await session.commit()
+    await session.refresh(friend)
+    session.add(friend_models.Friendship(user_id=test_user.id, friend_id=friend.id))
+    await session.commit()
+
+    headers = {**auth_headers, "Idempotency-Key": "abc-123"}
+    payload = {"title": "Once", "due_date": datetime.utcnow().isoformat(), "recipient_id": friend.id}
+    first = await client.post("/reminders/", json=payload, headers=headers)
+    second = await client.post("/reminders/", json=payload, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.headers["idempotent-replayed"] == "true"
+    assert first.json() == second.json()
+    reminders = (await session.execute(select(reminder_models.Reminder))).scalars().all()
+    assert len(reminders) == 1
+
+async def test_add_friend_retry_is_replayed(client: AsyncClient, auth_headers: dict, session: AsyncSession):
+    session.add(auth_models.User(email="pal@example.com", username="pal", full_name="Pal"))
+    await session.commit()
+
+    headers = {**auth_headers, "Idempotency-Key": "friend-1"}
+    first = await client.post("/friends/", json={"friend_email_or_username": "pal"}, headers=headers)
+    second = await client.post("/friends/", json={"friend_email_or_username": "pal"}, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert second.json()["username"] == "pal"
+
+    # Without the key the retry is a genuine duplicate
+    third = await client.post("/friends/", json={"friend_email_or_username": "pal"}, headers=auth_headers)
+    assert third.status_code == 400
+
+async def test_reused_key_with_different_body_is_rejected(client: AsyncClient, auth_headers: dict, session: AsyncSession):
+    session.add(auth_models.User(email="one@example.com", username="one", full_name="One"))
+    session.add(auth_models.User(email="two@example.com", username="two", full_name="Two"))
+    await session.commit()
+
+    headers = {**auth_headers, "Idempotency-Key": "friend-2"}
+    first = await client.post("/friends/", json={"friend_email_or_username": "one"}, headers=headers)
+    second = await client.post("/friends/", json={"friend_email_or_username": "two"}, headers=headers)
+    assert first.status_code == 200
+    assert second.status_code == 422
+
+async def test_memory_store_concurrent_duplicate_waits():
+    store = MemoryIdempotencyStore(ttl_seconds=60, max_bytes=1024)
+    assert await store.begin("k", "f") is None
+
+    waiter = asyncio.create_task(store.begin("k", "f"))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await store.complete("k", StoredResponse(200, b'{"ok": true}', "f"))
+    stored = await waiter
+    assert stored.body == b'{"ok": true}'
+
+async def test_memory_store_evicts_after_ttl():
+    now = [0.0]
+    store = MemoryIdempotencyStore(ttl_seconds=60, max_bytes=1024, clock=lambda: now[0])
+    await store.begin("k", "f")
+    await store.complete("k", StoredResponse(200, b"{}", "f"))
+    now[0] = 61
+    assert await store.begin("k", "f") is None
+
+async def test_memory_store_evicts_oldest_over_byte_cap():
+    store = MemoryIdempotencyStore(ttl_seconds=60, max_bytes=10)
+    for key in ("a", "b", "c"):
+        await store.begin(key, "f")
+        await store.complete(key, StoredResponse(200, b"12345", "f"))
+
+    assert await store.begin("a", "f") is None
+    assert (await store.begin("b", "f")).body == b"12345"
+    assert (await store.begin("c", "f")).body == b"12345"
+
+async def test_database_store_waits_for_in_flight(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'idempotency.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    polls = []
+
+    async def first_request_finishes(interval):
+        # Runs where the duplicate would sleep: the key is claimed, not completed
+        polls.append(interval)
+        await store.complete("k", StoredResponse(201, b"{}", "f"))
+
+    store = DatabaseIdempotencyStore(engine, ttl_seconds=60, sleep=first_request_finishes)
+    try:
+        assert await store.begin("k", "f") is None
+        stored = await store.begin("k", "f")
+        assert len(polls) == 1
+        assert stored.status_code == 201
+        assert stored.fingerprint == "f"
+
+        await store.release("k")
+        assert await store.begin("k", "f") is None
+    finally:
+        await engine.dispose()
@@ -1,9 +1,10 @@
 from httpx import AsyncClient, Response
 from unittest.mock import MagicMock, patch
 from sqlmodel import select
-from app.auth.models import User
+from app.auth.models import User, NotificationMode
 from app.friends.models import Friendship
 from app.reminders.models import Reminder
+from app.notifications.service import NotificationCoalescer
 
 async def test_update_device_token(client: AsyncClient, session, auth_headers, test_user):
     response = await client.put(
@@ -70,3 +71,87 @@ async def test_create_reminder_sends_notification(
         assert call_args[1]["json"]["to"] == "ExponentPushToken[recipient_token]"
         assert call_args[1]["json"]["title"] == f"New Reminder from {test_user.username}"
         assert call_args[1]["json"]["body"] == "Test Push"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_coalescer(clock, sent):
+    async def fake_send(message):
+        sent.append(message)
+        return Response(200, json={"data": {"status": "ok"}})
+    return NotificationCoalescer(window_seconds=60, digest_seconds=3600, clock=clock, send=fake_send)
+
+async def test_notifications_are_coalesced_per_recipient():
+    clock, sent = FakeClock(), []
+    coalescer = make_coalescer(clock, sent)
+    recipient = User(id=2, email="r@example.com", username="r", expo_push_token="ExponentPushToken[r]")
+
+    for i in range(4):
+        await coalescer.notify(recipient, "alice", f"Reminder {i}", i)
+        clock.now += 5
+
+    # Leading push goes out immediately, the rest wait for the window
+    assert len(sent) == 1
+    assert sent[0]["title"] == "New Reminder from alice"
+
+    await coalescer.flush_due()
+    assert len(sent) == 1
+
+    clock.now = 60
+    await coalescer.flush_due()
+    assert len(sent) == 2
+    assert sent[1]["title"] == "3 new reminders from alice"
+    assert sent[1]["data"]["reminderIds"] == [1, 2, 3]
+
+async def test_digest_mode_defers_all_notifications():
+    clock, sent = FakeClock(), []
+    coalescer = make_coalescer(clock, sent)
+    recipient = User(
+        id=3,
+        email="d@example.com",
+        username="d",
+        expo_push_token="ExponentPushToken[d]",
+        notification_mode=NotificationMode.Digest
+    )
+
+    await coalescer.notify(recipient, "alice", "One", 1)
+    await coalescer.notify(recipient, "bob", "Two", 2)
+    clock.now = 3599
+    await coalescer.flush_due()
+    assert sent == []
+
+    clock.now = 3600
+    await coalescer.flush_due()
+    assert len(sent) == 1
+    assert sent[0]["title"] == "2 new reminders from alice, bob"
+
+async def test_update_notification_preferences(client: AsyncClient, auth_headers, test_user):
+    response = await client.put(
+        "/auth/me/notification-preferences",
+        headers=auth_headers,
+        json={"mode": "Digest"}
+    )
+    assert response.status_code == 200
+    assert response.json()["notification_mode"] == "Digest"
+
+async def test_flush_all_sends_batches_before_their_window_closes():
+    clock, sent = FakeClock(), []
+    coalescer = make_coalescer(clock, sent)
+    recipient = User(
+        id=4,
+        email="s@example.com",
+        username="s",
+        expo_push_token="ExponentPushToken[s]",
+        notification_mode=NotificationMode.Digest
+    )
+
+    await coalescer.notify(recipient, "alice", "One", 1)
+    await coalescer.flush_all()
+    assert len(sent) == 1
+
+    await coalescer.flush_all()
+    assert len(sent) == 1
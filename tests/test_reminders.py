@@ -1,9 +1,14 @@
 from httpx import AsyncClient
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
 from app.auth import models as auth_models
 from app.friends import models as friend_models
 from app.reminders import models as reminder_models
+from app.reminders import recurrence, search, stats
+from app.core import security
+from sqlalchemy import inspect, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import upgrade_schema
 
 async def test_create_reminder(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
     friend = auth_models.User(email="friend3@example.com", username="friend3", full_name="Friend 3")
@@ -75,3 +80,338 @@ async def test_delete_reminder(client: AsyncClient, auth_headers: dict, session:
     # Verify deletion
     r = await session.get(reminder_models.Reminder, reminder.id)
     assert r is None
+
+def test_recurrence_expands_only_requested_window():
+    start = datetime(2020, 1, 6, 9, 0)  # Monday
+    rule = recurrence.parse_rule("FREQ=WEEKLY;BYDAY=MO,TH")
+    window_start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    window_end = datetime(2026, 3, 15, tzinfo=timezone.utc)
+    occurrences = list(recurrence.iter_occurrences(start, rule, window_start, window_end))
+    assert [o.day for o in occurrences] == [2, 5, 9, 12]
+    assert all(o.hour == 9 for o in occurrences)
+
+def test_recurrence_monthly_skips_short_months_and_honors_count():
+    rule = recurrence.parse_rule("FREQ=MONTHLY;COUNT=3")
+    start = datetime(2026, 1, 31, tzinfo=timezone.utc)
+    window_end = datetime(2027, 1, 1, tzinfo=timezone.utc)
+    occurrences = list(recurrence.iter_occurrences(start, rule, start, window_end))
+    assert [o.month for o in occurrences] == [1, 3, 5]
+
+async def test_list_reminders_expands_recurring_window(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    reminder = reminder_models.Reminder(
+        title="Water plants",
+        due_date=datetime(2026, 1, 1, 8, 0),
+        recurrence_rule="DAILY",
+        creator_id=test_user.id,
+        recipient_id=test_user.id
+    )
+    session.add(reminder)
+    await session.commit()
+    await session.refresh(reminder)
+
+    response = await client.put(
+        f"/reminders/{reminder.id}/occurrences",
+        json={"occurrence_date": "2026-02-02T08:00:00Z", "status": "Completed"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    response = await client.get(
+        "/reminders/",
+        params={"start": "2026-02-01T00:00:00Z", "end": "2026-02-04T00:00:00Z"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [d["status"] for d in data] == ["Created", "Completed", "Created"]
+    assert all(d["id"] == reminder.id for d in data)
+
+    response = await client.get(
+        "/reminders/",
+        params={"start": "2026-02-01T00:00:00Z", "end": "2026-02-02T00:00:00Z", "fields": "title"},
+        headers=auth_headers
+    )
+    assert response.json() == [
+        {"id": reminder.id, "title": "Water plants", "occurrence_date": "2026-02-01T08:00:00+00:00"}
+    ]
+
+    # Storage stays one series row plus one sparse exception
+    occurrences = await session.execute(select(reminder_models.ReminderOccurrence))
+    assert len(occurrences.scalars().all()) == 1
+
+async def test_create_reminder_rejects_invalid_recurrence(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    friend = auth_models.User(email="friend4@example.com", username="friend4", full_name="Friend 4")
+    session.add(friend)
+    await session.commit()
+    await session.refresh(friend)
+    session.add(friend_models.Friendship(user_id=test_user.id, friend_id=friend.id))
+    await session.commit()
+
+    response = await client.post(
+        "/reminders/",
+        json={
+            "title": "Stretch",
+            "due_date": datetime.utcnow().isoformat(),
+            "recipient_id": friend.id,
+            "recurrence_rule": "FREQ=HOURLY"
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+async def test_reminder_stats_follow_writes(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    friend = auth_models.User(email="friend5@example.com", username="friend5", full_name="Friend 5")
+    session.add(friend)
+    await session.commit()
+    await session.refresh(friend)
+    session.add(friend_models.Friendship(user_id=test_user.id, friend_id=friend.id))
+    await session.commit()
+
+    for title in ("One", "Two"):
+        response = await client.post(
+            "/reminders/",
+            json={"title": title, "due_date": datetime.utcnow().isoformat(), "recipient_id": friend.id},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+    reminder_id = response.json()["id"]
+
+    # Recipient completes one of them
+    friend_headers = {"Authorization": f"Bearer {security.create_access_token(subject=friend.id)}"}
+    response = await client.put(f"/reminders/{reminder_id}", json={"status": "Completed"}, headers=friend_headers)
+    assert response.status_code == 200
+
+    response = await client.get("/reminders/stats", headers=auth_headers)
+    assert response.json()["sent"] == 2
+
+    response = await client.get("/reminders/stats", headers=friend_headers)
+    data = response.json()
+    assert (data["received"], data["open"], data["completed"], data["overdue"]) == (2, 1, 1, 1)
+
+    response = await client.delete(f"/reminders/{reminder_id}", headers=auth_headers)
+    assert response.status_code == 200
+    response = await client.get("/reminders/stats", headers=friend_headers)
+    assert response.json()["completed"] == 0
+
+async def test_concurrent_status_change_counts_once(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    reminder = reminder_models.Reminder(
+        title="Race",
+        due_date=datetime.utcnow(),
+        creator_id=test_user.id,
+        recipient_id=test_user.id
+    )
+    session.add(reminder)
+    await stats.apply_deltas(session, stats.reminder_deltas(reminder))
+    await session.commit()
+
+    # Another request completes it first; this request still sees "Created"
+    await session.execute(
+        update(reminder_models.Reminder.__table__)
+        .where(reminder_models.Reminder.id == reminder.id)
+        .values(status=reminder_models.ReminderStatus.Completed)
+    )
+    await stats.apply_deltas(session, stats.status_change_deltas(
+        reminder, reminder_models.ReminderStatus.Created, reminder_models.ReminderStatus.Completed
+    ))
+    await session.commit()
+
+    response = await client.put(f"/reminders/{reminder.id}", json={"status": "Completed"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "Completed"
+
+    data = (await client.get("/reminders/stats", headers=auth_headers)).json()
+    assert (data["open"], data["completed"]) == (0, 1)
+
+async def test_rebuild_stats_repairs_drift(session: AsyncSession, test_user: auth_models.User):
+    # Written directly, bypassing the counters
+    session.add(reminder_models.Reminder(
+        title="Untracked",
+        due_date=datetime.utcnow(),
+        creator_id=test_user.id,
+        recipient_id=test_user.id
+    ))
+    await session.commit()
+
+    assert await stats.rebuild_stats(session, batch_size=1) == 1
+    data = await stats.get_stats(session, test_user.id)
+    assert (data.sent, data.received, data.open, data.completed) == (1, 1, 1, 0)
+
+async def test_list_reminders_sparse_fields_and_compression(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    for i in range(20):
+        session.add(reminder_models.Reminder(
+            title=f"Reminder {i}",
+            description="A rather long description " * 10,
+            due_date=datetime.utcnow(),
+            creator_id=test_user.id,
+            recipient_id=test_user.id
+        ))
+    await session.commit()
+
+    response = await client.get("/reminders/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 20
+
+    response = await client.get("/reminders/", headers={**auth_headers, "Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()) == 20
+
+    response = await client.get("/reminders/", params={"fields": "title"}, headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.json()[0] == {"id": 1, "title": "Reminder 0"}
+
+    response = await client.get("/reminders/", params={"fields": "title,secret"}, headers=auth_headers)
+    assert response.status_code == 400
+
+async def test_search_reminders(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    other = auth_models.User(email="other@example.com", username="other", full_name="Other")
+    session.add(other)
+    await session.commit()
+    await session.refresh(other)
+
+    rows = [
+        ("Dentist", "Call the clinic about the appointment", test_user.id),
+        ("Call mom", "Birthday plans", test_user.id),
+        ("Groceries", "Milk, eggs", test_user.id),
+        ("Call bank", "Not visible to testuser", other.id),
+    ]
+    for title, description, owner in rows:
+        session.add(reminder_models.Reminder(
+            title=title,
+            description=description,
+            due_date=datetime.utcnow(),
+            creator_id=owner,
+            recipient_id=owner
+        ))
+    await session.commit()
+
+    response = await client.get("/reminders/search", params={"q": "call"}, headers=auth_headers)
+    assert response.status_code == 200
+    # Title matches rank above description matches
+    assert [r["title"] for r in response.json()] == ["Call mom", "Dentist"]
+
+    response = await client.get("/reminders/search", params={"q": "call", "limit": 1, "offset": 1}, headers=auth_headers)
+    assert [r["title"] for r in response.json()] == ["Dentist"]
+
+    # Index follows updates and deletes
+    async def find(title):
+        query = select(reminder_models.Reminder).where(reminder_models.Reminder.title == title)
+        return (await session.execute(query)).scalars().first()
+
+    groceries = await find("Groceries")
+    dentist = await find("Dentist")
+    response = await client.put(f"/reminders/{groceries.id}", json={"title": "Call grocer"}, headers=auth_headers)
+    assert response.status_code == 200
+    response = await client.delete(f"/reminders/{dentist.id}", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = await client.get("/reminders/search", params={"q": "call"}, headers=auth_headers)
+    assert sorted(r["title"] for r in response.json()) == ["Call grocer", "Call mom"]
+
+def test_recurrence_stops_at_largest_date():
+    start = datetime(9999, 10, 1, tzinfo=timezone.utc)
+    window_end = datetime(9999, 12, 31, tzinfo=timezone.utc)
+    for rule in ("DAILY", "MONTHLY", "FREQ=WEEKLY;BYDAY=MO,SU"):
+        occurrences = list(recurrence.iter_occurrences(start, recurrence.parse_rule(rule), start, window_end))
+        assert occurrences
+
+async def test_list_reminders_rejects_oversized_window(client: AsyncClient, auth_headers: dict):
+    response = await client.get(
+        "/reminders/",
+        params={"start": "2026-01-01T00:00:00Z", "end": "9999-12-31T00:00:00Z"},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+async def test_search_index_setup_is_idempotent(engine, session: AsyncSession, test_user: auth_models.User):
+    session.add(reminder_models.Reminder(
+        title="Indexed once",
+        due_date=datetime.utcnow(),
+        creator_id=test_user.id,
+        recipient_id=test_user.id
+    ))
+    await session.commit()
+
+    # As on every startup: existing table, structures ensured again
+    async with engine.begin() as conn:
+        await conn.run_sync(search.create_search_index)
+
+    results = await search.search_reminders(session, test_user.id, "indexed", limit=10, offset=0)
+    assert [r.title for r in results] == ["Indexed once"]
+
+async def test_recurrence_interval_is_capped(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    response = await client.post(
+        "/reminders/",
+        json={
+            "title": "Once an eon",
+            "due_date": "2026-01-01T08:00:00Z",
+            "recipient_id": test_user.id,
+            "recurrence_rule": f"FREQ=DAILY;INTERVAL={recurrence.MAX_INTERVAL + 1}"
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    # A series stored before the cap does not break the recipient's list
+    session.add(reminder_models.Reminder(
+        title="Legacy",
+        due_date=datetime(2026, 1, 1, 8, 0),
+        recurrence_rule="FREQ=DAILY;INTERVAL=1000000000",
+        creator_id=test_user.id,
+        recipient_id=test_user.id
+    ))
+    await session.commit()
+    response = await client.get(
+        "/reminders/",
+        params={"start": "2026-06-01T00:00:00Z", "end": "2026-07-01T00:00:00Z"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+async def test_rescheduling_a_series_drops_its_exceptions(client: AsyncClient, auth_headers: dict, session: AsyncSession, test_user: auth_models.User):
+    reminder = reminder_models.Reminder(
+        title="Stand-up",
+        due_date=datetime(2026, 1, 1, 8, 0),
+        recurrence_rule="DAILY",
+        creator_id=test_user.id,
+        recipient_id=test_user.id
+    )
+    session.add(reminder)
+    await session.commit()
+    await session.refresh(reminder)
+    response = await client.put(
+        f"/reminders/{reminder.id}/occurrences",
+        json={"occurrence_date": "2026-01-02T08:00:00Z", "status": "Completed"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    # Same date again keeps the exception
+    response = await client.put(f"/reminders/{reminder.id}", json={"due_date": "2026-01-01T08:00:00Z"}, headers=auth_headers)
+    assert response.status_code == 200
+    occurrences = await session.execute(select(reminder_models.ReminderOccurrence))
+    assert len(occurrences.scalars().all()) == 1
+
+    response = await client.put(f"/reminders/{reminder.id}", json={"recurrence_rule": "WEEKLY"}, headers=auth_headers)
+    assert response.status_code == 200
+    occurrences = await session.execute(select(reminder_models.ReminderOccurrence))
+    assert occurrences.scalars().all() == []
+
+async def test_upgrade_schema_adds_missing_columns(engine, session: AsyncSession, test_user: auth_models.User):
+    # Tables as created before recurring reminders and digest mode existed
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_reminder_recipient_status_due_date"))
+        await conn.execute(text("ALTER TABLE reminder DROP COLUMN recurrence_rule"))
+        await conn.execute(text('ALTER TABLE "user" DROP COLUMN notification_mode'))
+        await conn.run_sync(upgrade_schema)
+        await conn.run_sync(upgrade_schema)
+
+    result = await session.execute(select(reminder_models.Reminder))
+    assert result.scalars().all() == []
+    user = await session.get(auth_models.User, test_user.id, populate_existing=True)
+    assert user.notification_mode == auth_models.NotificationMode.Immediate
+    async with engine.connect() as conn:
+        indexes = await conn.run_sync(lambda c: inspect(c).get_indexes("reminder"))
+    assert "ix_reminder_recipient_status_due_date" in {i["name"] for i in indexes}